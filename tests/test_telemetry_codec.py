@@ -0,0 +1,128 @@
+import random
+
+import ACOM
+
+
+def makeMessage(status, temp, fan, band, drive, power, rpower, swr, error):
+    msg = bytearray(72)
+    msg[0] = 0x55
+    msg[1] = 0x2F
+    msg[3] = status << 4
+    for i, v in ((16, temp), (20, drive), (22, power), (24, rpower), (26, swr)):
+        msg[i] = v & 0xFF
+        msg[i + 1] = v >> 8
+    msg[66] = error
+    msg[69] = (fan << 4) | band
+    return msg
+
+
+def frames(n, seed=1):
+    rnd = random.Random(seed)
+    out = []
+    for k in range(n):
+        if (k // 30) % 2:
+            f = [7, 313 + k // 100, 2, 5, rnd.randint(300, 400), rnd.randint(600, 700),
+                 rnd.randint(10, 30), rnd.randint(110, 130), 0xFF]
+        else:
+            f = [6, 313 + k // 100, 1, 5, 0, 0, 0, 0, 0xFF]
+        out.append(f)
+    return out
+
+
+def test_telemetry_fields():
+    msg = makeMessage(7, 313, 2, 5, 350, 650, 20, 120, 0x70)
+    assert ACOM.telemetryFields(msg) == [7, 313, 2, 5, 350, 650, 20, 120, 0x70]
+
+
+def test_round_trip():
+    enc = ACOM.TelemetryEncoder()
+    dec = ACOM.TelemetryDecoder()
+    data = frames(1000)
+    for f in data:
+        assert dec.decode(enc.encode(f)) == f
+    assert not dec.isError
+
+
+def test_negative_change_and_large_values():
+    enc = ACOM.TelemetryEncoder()
+    dec = ACOM.TelemetryDecoder()
+    for f in ([0] * 9, [65535] * 9, [1] * 9, [300, 0, 65535, 2, 1, 0, 7, 9, 255]):
+        assert dec.decode(enc.encode(f)) == f
+
+
+def test_unchanged_frame_is_small():
+    enc = ACOM.TelemetryEncoder()
+    f = frames(1)[0]
+    enc.encode(f)
+    assert len(enc.encode(f)) == 5
+
+
+def test_lost_frame_waits_for_keyframe():
+    enc = ACOM.TelemetryEncoder(keyframeInterval=10)
+    dec = ACOM.TelemetryDecoder()
+    data = frames(40)
+    encoded = [enc.encode(f) for f in data]
+    for n, e in enumerate(encoded):
+        if n == 3: continue
+        out = dec.decode(e)
+        if 3 < n < 10:
+            assert out is None
+            assert dec.isError
+        else:
+            assert out == data[n]
+
+
+def test_lost_keyframe_waits_for_next_keyframe():
+    enc = ACOM.TelemetryEncoder(keyframeInterval=10)
+    dec = ACOM.TelemetryDecoder()
+    data = frames(30)
+    encoded = [enc.encode(f) for f in data]
+    for n, e in enumerate(encoded):
+        if n == 10: continue
+        out = dec.decode(e)
+        if 10 < n < 20: assert out is None
+        else: assert out == data[n]
+
+
+def test_long_outage_is_not_applied_to_stale_state():
+    enc = ACOM.TelemetryEncoder()
+    dec = ACOM.TelemetryDecoder()
+    dec.decode(enc.encode([1] * 9))
+    for k in range(256): enc.encode([k] * 9)
+    for k in range(100):
+        e = enc.encode([999] * 9)
+        out = dec.decode(e)
+        if e[0] == 0x4B: break
+        assert out is None
+    assert out == [999] * 9
+    assert dec.decode(enc.encode([999] * 9)) == [999] * 9
+
+
+def test_truncated_and_garbage_input():
+    enc = ACOM.TelemetryEncoder()
+    dec = ACOM.TelemetryDecoder()
+    data = frames(3)
+    key = enc.encode(data[0])
+    delta = enc.encode(data[1])
+    for bad in (b"", b"\x4B", key[:-1], key + b"\x00", b"\x00\x01\x02", b"\x4B" + b"\xFF" * 20):
+        assert dec.decode(bad) is None
+        assert dec.isError
+    assert dec.decode(key) == data[0]
+    assert dec.decode(delta[:-1]) is None
+    # the decoder drops deltas after a bad frame until the next keyframe
+    assert dec.decode(delta) is None
+    rnd = random.Random(3)
+    for k in range(200):
+        junk = bytes(rnd.randint(0, 255) for _ in range(rnd.randint(0, 12)))
+        dec.decode(junk)
+
+
+def test_telemetry_log(tmp_path):
+    fileName = str(tmp_path / "telemetry.log")
+    data = frames(200)
+    for session in range(2):
+        log = ACOM.TelemetryLog()
+        log.open(fileName)
+        for f in data: log.put(makeMessage(*f))
+        log.close()
+    assert ACOM.TelemetryLog().read(fileName) == data + data